@@ -9,7 +9,7 @@ import sys
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from packages.shared.database import init_db
 from packages.shared.logger import setup_logging
@@ -59,7 +59,11 @@ def _validate_cors_config() -> list[str]:
 # Validate CORS configuration before app creation
 _cors_origins = _validate_cors_config()
 
-app = FastAPI(title='MailShieldAI Dashboard API', version='0.2.0')
+app = FastAPI(
+    title='MailShieldAI Dashboard API',
+    version='0.2.0',
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
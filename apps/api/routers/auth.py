@@ -50,7 +50,6 @@ async def save_tokens(
         session.add(user)
     
     await session.commit()
-    await session.refresh(user)
     
     logger.info('Successfully saved tokens for user: %s (id=%s)', request.email, user.id)
     return {"status": "success", "user_id": str(user.id)}
@@ -3,9 +3,12 @@ import json
 import logging
 import os
 import uuid
+from datetime import datetime, timezone
 from typing import Optional, Iterable
 
 from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy import RowMapping, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.concurrency import run_in_threadpool
@@ -16,7 +19,7 @@ from apps.api.services.gmail import fetch_gmail_messages, GmailService
 from apps.api.services.risk import evaluate_static_risk
 from packages.shared.constants import EmailStatus
 from packages.shared.database import get_session
-from packages.shared.models import User, EmailEvent, EmailRead
+from packages.shared.models import User, EmailEvent, EmailRead, utc_now
 from packages.shared.queue import get_redis_client, EMAIL_INTENT_QUEUE, EMAIL_ANALYSIS_QUEUE, JOB_AGGREGATOR_QUEUE
 from packages.shared.types import BackgroundSyncRequest
 
@@ -28,9 +31,21 @@ downstream_tasks = []
 _sync_locks: dict[uuid.UUID, asyncio.Lock] = {}
 
 
-async def email_exists(session: AsyncSession, message_id: str) -> bool:
-    result = await session.exec(select(EmailEvent).where(EmailEvent.message_id == message_id))
-    return result.first() is not None
+async def existing_message_ids(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    message_ids: list[str],
+) -> set[str]:
+    """Return the subset of message_ids already stored for this user (single IN query)."""
+    if not message_ids:
+        return set()
+    result = await session.exec(
+        select(EmailEvent.message_id).where(
+            EmailEvent.user_id == user_id,
+            EmailEvent.message_id.in_(message_ids),  # type: ignore
+        )
+    )
+    return set(result.all())
 
 
 def build_email_event(
@@ -59,7 +74,8 @@ def build_email_event(
         subject=email.subject,
         body_preview=email.body_preview,
         message_id=email.message_id,
-        received_at=email.received_at,
+        # Undated messages fall back to ingest time so list_emails' cursor never meets NULL
+        received_at=email.received_at or utc_now(),
         spf_status=email.auth_status.spf if email.auth_status else None,
         dkim_status=email.auth_status.dkim if email.auth_status else None,
         dmarc_status=email.auth_status.dmarc if email.auth_status else None,
@@ -104,7 +120,7 @@ def build_email_event(
             'email_id': job_id_str,  # Worker expects 'email_id', not 'job_id'
             'message_id': email.message_id,
             'extracted_urls': json.dumps(email.extracted_urls),
-            'attachment_metadata': json.dumps([att.model_dump_json() for att in email.attachments]),
+            'attachment_metadata': json.dumps([att.model_dump() for att in email.attachments]),
         }
         downstream_tasks.append((EMAIL_ANALYSIS_QUEUE, sandbox_payload))
         logger.debug(f"Job {job_id_str}: Added sandbox analysis task (risk evaluation triggered)")
@@ -129,15 +145,25 @@ async def ingest_emails(
     """
     Deduplicate, persist emails, and enqueue downstream tasks.
     """
-    count = 0
     skipped = 0
     downstream_tasks: list[tuple[str, dict]] = []
 
+    emails = list(emails)
+    seen = await existing_message_ids(
+        session,
+        user_id,
+        [email.message_id for email in emails if email.message_id],
+    )
+
+    rows: list[dict] = []
+    tasks_by_id: dict[uuid.UUID, list[tuple[str, dict]]] = {}
+
     for email in emails:
-        if await email_exists(session, email.message_id):
+        if email.message_id in seen:
             logger.debug('Email already exists: %s', email.message_id)
             skipped += 1
             continue
+        seen.add(email.message_id)
 
         email_event, tasks = build_email_event(
             user_id=user_id,
@@ -145,19 +171,38 @@ async def ingest_emails(
             status=status,
         )
 
-        session.add(email_event)
-        downstream_tasks.extend(tasks)
-        count += 1
+        rows.append(email_event.model_dump())
+        tasks_by_id[email_event.id] = tasks
 
-    if count == 0:
+    if not rows:
         logger.info('No new emails to ingest (skipped %d duplicate(s))', skipped)
         return 0
 
+    # Single multi-row INSERT; rows already stored by a concurrent sync are skipped
+    # by ON CONFLICT (via uq_email_events_user_id_message_id once migrated) and not
+    # queued downstream. Untargeted, so it also works before that index exists.
+    result = await session.execute(
+        pg_insert(EmailEvent).values(rows).on_conflict_do_nothing().returning(EmailEvent.id)
+    )
+    inserted_ids = set(result.scalars().all())
     await session.commit()
 
+    count = len(inserted_ids)
+    skipped += len(rows) - count
+    for event_id, tasks in tasks_by_id.items():
+        if event_id in inserted_ids:
+            downstream_tasks.extend(tasks)
+
+    if count == 0:
+        logger.info('No new emails to ingest (skipped %d duplicate(s))', skipped)
+        return 0
+
+    # Publish in one round-trip; control messages keep their position ahead of workers.
     redis = await get_redis_client()
-    for stream, payload in downstream_tasks:
-        await redis.xadd(stream, payload)
+    async with redis.pipeline(transaction=False) as pipe:
+        for stream, payload in downstream_tasks:
+            pipe.xadd(stream, payload)
+        await pipe.execute()
 
     logger.info(
         'Queued %s downstream tasks for %s new email(s) (skipped %d duplicate(s))',
@@ -171,27 +216,51 @@ async def ingest_emails(
 
 router = APIRouter()
 
+# Only the columns EmailRead exposes, so list queries skip the rest of the row
+_EMAIL_READ_COLUMNS = [getattr(EmailEvent, name) for name in EmailRead.model_fields]
+
 
 @router.get('', response_model=list[EmailRead])
 async def list_emails(
     status_filter: Optional[EmailStatus] = None,
     limit: int = 100,
     offset: int = 0,
+    before: Optional[datetime] = None,
+    before_id: Optional[uuid.UUID] = None,
     user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
-) -> list[EmailEvent]:
-    """List emails for the current user."""
+) -> list[RowMapping]:
+    """List emails for the current user.
+
+    For keyset pagination pass the last row of the previous page as the
+    cursor: its received_at as `before` and its id as `before_id`. Rows are
+    ordered by (received_at, id) descending, so emails sharing a timestamp
+    are neither skipped nor repeated. `offset` still works but gets slower
+    as it grows.
+    """
+    if (before is None) != (before_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='before and before_id must be provided together',
+        )
+    if before is not None and before.tzinfo is not None:
+        # received_at is naive UTC (TIMESTAMP WITHOUT TIME ZONE)
+        before = before.astimezone(timezone.utc).replace(tzinfo=None)
+
     query = (
-        select(EmailEvent)
+        select(*_EMAIL_READ_COLUMNS)
         .where(EmailEvent.user_id == user.id)
-        .order_by(EmailEvent.received_at.desc())  # type: ignore
+        .order_by(EmailEvent.received_at.desc(), EmailEvent.id.desc())  # type: ignore
     )
     if status_filter:
         query = query.where(EmailEvent.status == status_filter)
+    if before is not None:
+        query = query.where(tuple_(EmailEvent.received_at, EmailEvent.id) < tuple_(before, before_id))
     query = query.limit(limit).offset(offset)
 
     result = await session.exec(query)
-    return list(result.all())
+    # response_model validates and serializes the mappings in a single pass
+    return [row._mapping for row in result.all()]
 
 
 @router.post('/sync', status_code=status.HTTP_202_ACCEPTED)
@@ -22,6 +22,9 @@ if not GOOGLE_CLIENT_ID and not DEV_MODE:
     # This check happens at import time, usually fine for services
     logger.warning("AUTH_GOOGLE_ID environment variable is not set. Service may not function correctly in production.")
 
+# Shared transport: keeps the HTTP connection used to fetch Google's signing certs alive
+_google_request = requests.Request()
+
 def _verify_google_token(token: str) -> dict:
     """Verify Google OAuth token and return payload."""
     if not token:
@@ -36,7 +39,7 @@ def _verify_google_token(token: str) -> dict:
     try:
         id_info = id_token.verify_oauth2_token(
             token, 
-            requests.Request(), 
+            _google_request, 
             audience=GOOGLE_CLIENT_ID
         )
         return id_info
@@ -95,7 +98,6 @@ async def get_current_user(
         session.add(user)
         try:
             await session.commit()
-            await session.refresh(user)
             logger.info(f"Created new user: {_mask_email(email)} (id: {user.id})")
         except IntegrityError:
             await session.rollback()
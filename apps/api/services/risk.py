@@ -1,12 +1,24 @@
 import logging
-import os
+from functools import lru_cache
+from typing import Optional
+
 from packages.shared.types import StructuredEmail
 
 logger = logging.getLogger(__name__)
 
 
 # --- Risk Gate Logic (Pure, Deterministic) ---
-RISKY_EXTENSIONS = {".exe", ".scr", ".vbs", ".js", ".bat", ".iso", ".dll", ".ps1"}
+RISKY_EXTENSIONS = frozenset({"exe", "scr", "vbs", "js", "bat", "iso", "dll", "ps1"})
+
+
+@lru_cache(maxsize=256)
+def _attachment_risk(ext: str, mime_type: str) -> tuple[int, Optional[str]]:
+    """Score delta and reason for one attachment, memoized by (extension, MIME type)."""
+    if ext in RISKY_EXTENSIONS:
+        return 70, f"Risky extension .{ext}"
+    if mime_type == "application/zip":
+        return 30, "Archive attachment"  # Inspecting zips is standard
+    return 0, None
 
 
 def evaluate_static_risk(payload: StructuredEmail) -> tuple[bool, str, int]:
@@ -20,15 +32,14 @@ def evaluate_static_risk(payload: StructuredEmail) -> tuple[bool, str, int]:
 
     # 1. Attachment Check
     for att in payload.attachments:
-        ext = os.path.splitext(att.filename)[1].lower()
-        if ext in RISKY_EXTENSIONS:
-            score += 70
-            reasons.append(f"Risky extension {ext}")
+        name = att.filename
+        dot = name.rfind(".")
+        ext = name[dot + 1:].lower() if dot >= 0 else ""
+        delta, reason = _attachment_risk(ext, att.mime_type)
+        if reason:
+            score += delta
+            reasons.append(reason)
             should_sandbox = True
-        elif att.mime_type == "application/zip":
-            score += 30
-            reasons.append("Archive attachment")
-            should_sandbox = True  # Inspecting zips is standard
 
     # 2. URL Check (Basic heuristics for Phase 2A)
     if len(payload.extracted_urls) > 0:
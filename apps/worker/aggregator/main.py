@@ -32,7 +32,7 @@ from fastapi import FastAPI
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from packages.shared.database import get_session, init_db
+from packages.shared.database import init_db, session_scope
 from packages.shared.constants import EmailStatus
 from packages.shared.models import EmailEvent
 from packages.shared.queue import (
@@ -237,12 +237,6 @@ async def finalize_job(redis, job_id: str, state: dict) -> None:
         # STEP 2: Update database with COMPLETED status
         gmail_message_id = None
 
-        @asynccontextmanager
-        async def session_scope():
-            async for s in get_session():
-                yield s
-                break
-
         async with session_scope() as session:
             try:
                 import uuid
@@ -265,7 +259,6 @@ async def finalize_job(redis, job_id: str, state: dict) -> None:
 
                 session.add(email)
                 await session.commit()
-                await session.refresh(email)
 
                 logger.info(
                     f"Job {job_id}: Database updated - status=COMPLETED "
@@ -5,22 +5,28 @@ import base64
 import json
 import os
 import random
+import threading
 import uuid
 import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
 from fastapi import FastAPI
+from pydantic import TypeAdapter
 
 import google.auth
 import httpx
+import orjson
 from googleapiclient.discovery import build
 
+from sqlalchemy import update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from packages.shared.database import get_session, init_db
+from packages.shared.database import init_db, session_scope
 from packages.shared.constants import EmailStatus
 from packages.shared.models import EmailEvent
 from packages.shared.queue import (
@@ -41,8 +47,48 @@ HA_API_KEY = os.getenv("HYBRID_ANALYSIS_API_KEY")
 USE_REAL_SANDBOX = os.getenv("USE_REAL_SANDBOX", "false").lower() == "true"
 HA_API_URL = "https://hybrid-analysis.com/api/v2"
 
+# --- Payload Decoding ---
+# Built once; list fields arrive from the stream as JSON array strings
+ATTACHMENT_LIST_ADAPTER = TypeAdapter(list[AttachmentMetadata])
+URL_LIST_ADAPTER = TypeAdapter(list[str])
+
 # --- Concurrency Control ---
 GEMINI_SEMAPHORE = asyncio.Semaphore(2)  # Max 2 concurrent AI calls
+# Max emails (and DB sessions) in flight. Also bounds what is read but not yet
+# acked: the consumer name is random per start and nothing reclaims pending
+# entries, so a crash strands at most this many messages.
+MAX_IN_FLIGHT = 8
+
+# --- Gmail Client Cache ---
+_gmail_local = threading.local()
+# Shared pool for blocking Gmail calls; its size caps concurrent fetches
+_GMAIL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gmail-fetch")
+
+# --- Hybrid Analysis Client ---
+_ha_client: Optional[httpx.AsyncClient] = None
+# Loop time until which submissions are skipped after a 429 (never slept on)
+_ha_submit_paused_until = 0.0
+
+# --- Hybrid Analysis Report Poller ---
+HA_POLL_TICK = 1  # Seconds between poller sweeps
+HA_POLL_INITIAL_DELAY = 5.0  # First poll soon; quick jobs finish fast
+HA_POLL_MAX_DELAY = 60.0
+HA_POLL_BACKOFF = 1.7
+HA_POLL_TIMEOUT = 600  # ~10 minutes polling
+
+
+@dataclass
+class PendingReport:
+    """An HA job awaiting its report, tracked by the shared poller."""
+
+    future: asyncio.Future
+    next_poll_at: float
+    deadline: float
+    delay: float = HA_POLL_INITIAL_DELAY
+
+
+_ha_pending: Dict[str, PendingReport] = {}
+_ha_poller_task: Optional[asyncio.Task] = None
 
 
 def calculate_score_from_verdict(verdict: str) -> int:
@@ -62,12 +108,20 @@ async def analyze_urls_with_limit(urls: list[str]) -> tuple[str, str]:
 
 
 def get_gmail_service() -> Any:
-    """Builds and returns the Gmail API service."""
+    """Returns the Gmail API service, built once per thread and then reused.
+
+    The underlying httplib2 client is not thread-safe, so each executor
+    thread keeps its own instance instead of sharing a module-level one.
+    """
+    service = getattr(_gmail_local, "service", None)
+    if service is not None:
+        return service
     try:
         creds, _ = google.auth.default(
             scopes=["https://www.googleapis.com/auth/gmail.readonly"]
         )
-        service = build("gmail", "v1", credentials=creds)
+        service = build("gmail", "v1", credentials=creds, cache_discovery=False)
+        _gmail_local.service = service
         return service
     except Exception as e:
         logger.error(f"Failed to get Gmail service: {e}")
@@ -101,105 +155,232 @@ async def fetch_attachment_async(message_id: str, attachment_id: str) -> bytes |
     """Asynchronously fetches an email attachment from Gmail."""
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(
-        None, fetch_attachment_from_gmail, message_id, attachment_id
+        _GMAIL_EXECUTOR, fetch_attachment_from_gmail, message_id, attachment_id
     )
 
 
+def retry_after_seconds(resp: httpx.Response, default: float) -> float:
+    """Delay requested by a Retry-After header (seconds form), else the default."""
+    value = resp.headers.get("Retry-After", "")
+    return float(value) if value.isdigit() else default
+
+
+def with_jitter(delay: float) -> float:
+    """Spread polls out so jobs submitted together don't poll in lockstep."""
+    return delay + random.uniform(0, delay * 0.25)
+
+
+def get_ha_client() -> httpx.AsyncClient:
+    """Returns the shared Hybrid Analysis client, creating it on first use.
+
+    Reusing one client keeps connections alive across submissions and polls.
+    """
+    global _ha_client
+
+    if _ha_client is None:
+        _ha_client = httpx.AsyncClient(
+            base_url=HA_API_URL,
+            headers={"api-key": HA_API_KEY or "", "User-Agent": "MailShieldAI/1.0"},
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+    return _ha_client
+
+
+async def close_ha_client() -> None:
+    """Closes the shared Hybrid Analysis client."""
+    global _ha_client
+
+    if _ha_client is not None:
+        await _ha_client.aclose()
+        _ha_client = None
+
+
 async def submit_to_hybrid_analysis(
     file_content: Optional[bytes] = None,
     filename: Optional[str] = None,
     url: Optional[str] = None,
 ) -> Optional[str]:
     """Submit a file or URL to Hybrid Analysis for scanning."""
+    global _ha_submit_paused_until
+
     if not HA_API_KEY:
         logger.warning("HYBRID_ANALYSIS_API_KEY is not set. Skipping scan.")
         return None
 
-    headers = {"api-key": HA_API_KEY, "User-Agent": "MailShieldAI/1.0"}
+    loop = asyncio.get_running_loop()
+    if loop.time() < _ha_submit_paused_until:
+        logger.warning("Hybrid Analysis submissions paused after a rate limit. Skipping.")
+        return None
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    client = get_ha_client()
+    try:
+        if file_content:
+            files = {"file": (filename, file_content)}
+            data = {"environment_id": "100", "allow_community_access": "true"}
+            resp = await client.post("/submit/file", files=files, data=data)
+        elif url:
+            data = {
+                "url": url,
+                "environment_id": "100",
+                "allow_community_access": "true",
+            }
+            resp = await client.post("/submit/url", data=data)
+        else:
+            return None
+
+        if resp.status_code == 429:
+            # Pause further submissions instead of sleeping here: the caller runs
+            # inside a batch gather, and this submission is not retried anyway
+            backoff = min(retry_after_seconds(resp, default=60.0), HA_POLL_MAX_DELAY)
+            _ha_submit_paused_until = loop.time() + backoff
+            logger.warning(f"Hybrid Analysis rate limit hit. Pausing submissions for {backoff:.0f}s.")
+            return None
+
+        resp.raise_for_status()
+        result = orjson.loads(resp.content)
+        job_id = result.get("job_id")
+        logger.info(f"Successfully submitted to Hybrid Analysis. Job ID: {job_id}")
+        return job_id
+
+    except httpx.HTTPStatusError as e:
+        logger.error(
+            f"HTTP error during HA submission: {e.response.status_code} - {e.response.text}"
+        )
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during HA submission: {e}")
+
+    return None
+
+
+async def fetch_ha_report(
+    job_id: str,
+) -> tuple[Optional[Dict[str, Any]], Optional[float]]:
+    """Fetch a Hybrid Analysis report once.
+
+    Returns (report, retry_after): the report only if the job has finished,
+    and the server-requested delay if HA rate limited us.
+    """
+    client = get_ha_client()
+    try:
+        resp = await client.get(f"/report/{job_id}", timeout=10.0)
+        if resp.status_code == 404:
+            logger.info(f"Job {job_id} not ready yet (404).")
+            return None, None
+
+        if resp.status_code == 429:
+            retry_after = retry_after_seconds(resp, default=HA_POLL_MAX_DELAY)
+            logger.warning(f"Rate limited while polling {job_id}; retrying in {retry_after:.0f}s.")
+            return None, retry_after
+
+        resp.raise_for_status()
+        report = orjson.loads(resp.content)
+
+        if report.get("state") == "SUCCESS":
+            logger.info(f"HA report for job {job_id} is complete.")
+            return report, None
+        logger.info(
+            f"HA report for job {job_id} not yet complete. State: {report.get('state')}"
+        )
+
+    except httpx.HTTPStatusError as e:
+        logger.warning(
+            f"HTTP error while polling for {job_id}: {e.response.status_code}"
+        )
+    except Exception as e:
+        logger.warning(f"An unexpected error occurred while polling {job_id}: {e}")
+
+    return None, None
+
+
+async def _poll_pending_report(job_id: str, pending: PendingReport) -> None:
+    """Poll one due job and resolve or reschedule it with exponential backoff."""
+    report, retry_after = await fetch_ha_report(job_id)
+    if pending.future.done():  # Waiter went away while we were polling
+        _ha_pending.pop(job_id, None)
+        return
+
+    if report is not None:
+        pending.future.set_result(report)
+        _ha_pending.pop(job_id, None)
+        return
+
+    now = asyncio.get_running_loop().time()
+    if now >= pending.deadline:
+        logger.warning(f"Polling for job {job_id} timed out after ~10 minutes.")
+        pending.future.set_result(None)
+        _ha_pending.pop(job_id, None)
+        return
+
+    pending.delay = min(HA_POLL_MAX_DELAY, pending.delay * HA_POLL_BACKOFF)
+    delay = retry_after if retry_after is not None else with_jitter(pending.delay)
+    logger.info(f"Waiting {delay:.0f}s before polling HA job {job_id}")
+    pending.next_poll_at = now + delay
+
+
+async def _ha_poller() -> None:
+    """Single background loop that polls every outstanding HA job when it is due."""
+    loop = asyncio.get_running_loop()
+    while True:
         try:
-            if file_content:
-                files = {"file": (filename, file_content)}
-                data = {"environment_id": "100", "allow_community_access": "true"}
-                resp = await client.post(
-                    f"{HA_API_URL}/submit/file", headers=headers, files=files, data=data
-                )
-            elif url:
-                data = {
-                    "url": url,
-                    "environment_id": "100",
-                    "allow_community_access": "true",
-                }
-                resp = await client.post(
-                    f"{HA_API_URL}/submit/url", headers=headers, data=data
+            await asyncio.sleep(HA_POLL_TICK)
+            now = loop.time()
+            due = [
+                (job_id, pending)
+                for job_id, pending in _ha_pending.items()
+                if pending.next_poll_at <= now
+            ]
+            if due:
+                await asyncio.gather(
+                    *(_poll_pending_report(job_id, pending) for job_id, pending in due)
                 )
-            else:
-                return None
-
-            if resp.status_code == 429:
-                logger.warning("Hybrid Analysis rate limit hit. Backing off for 60s.")
-                await asyncio.sleep(60)
-                return None
-
-            resp.raise_for_status()
-            result = resp.json()
-            job_id = result.get("job_id")
-            logger.info(f"Successfully submitted to Hybrid Analysis. Job ID: {job_id}")
-            return job_id
-
-        except httpx.HTTPStatusError as e:
-            logger.error(
-                f"HTTP error during HA submission: {e.response.status_code} - {e.response.text}"
-            )
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"An unexpected error occurred during HA submission: {e}")
+            logger.error(f"HA poller error: {e}")
 
-        return None
 
+async def stop_ha_poller() -> None:
+    """Cancel the shared HA poller task."""
+    global _ha_poller_task
 
-async def poll_ha_report(job_id: str) -> Optional[Dict[str, Any]]:
-    """Poll Hybrid Analysis for a report until it's complete or times out."""
-    if not job_id:
-        return None
+    if _ha_poller_task is not None:
+        _ha_poller_task.cancel()
+        try:
+            await _ha_poller_task
+        except asyncio.CancelledError:
+            pass
+        _ha_poller_task = None
 
-    headers = {"api-key": HA_API_KEY, "User-Agent": "MailShieldAI/1.0"}
-    url = f"{HA_API_URL}/report/{job_id}"
-    delays = [30, 60, 60, 60, 60, 60, 60, 60, 60, 60]  # ~10 minutes polling
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for delay in delays:
-            logger.info(f"Waiting {delay}s before polling HA job {job_id}")
-            await asyncio.sleep(delay)
+async def poll_ha_report(job_id: str) -> Optional[Dict[str, Any]]:
+    """Wait for a Hybrid Analysis report until it's complete or times out.
 
-            try:
-                resp = await client.get(url, headers=headers)
-                if resp.status_code == 404:
-                    logger.info(f"Job {job_id} not ready yet (404).")
-                    continue
+    Jobs are registered with the shared poller instead of each caller
+    running its own sleep/poll loop.
+    """
+    global _ha_poller_task
 
-                resp.raise_for_status()
-                report = resp.json()
+    if not job_id:
+        return None
 
-                if report.get("state") == "SUCCESS":
-                    logger.info(f"HA report for job {job_id} is complete.")
-                    return report
-                else:
-                    logger.info(
-                        f"HA report for job {job_id} not yet complete. State: {report.get('state')}"
-                    )
+    loop = asyncio.get_running_loop()
+    pending = _ha_pending.get(job_id)
+    if pending is None:
+        now = loop.time()
+        delay = with_jitter(HA_POLL_INITIAL_DELAY)
+        logger.info(f"Waiting {delay:.0f}s before polling HA job {job_id}")
+        pending = PendingReport(
+            future=loop.create_future(),
+            next_poll_at=now + delay,
+            deadline=now + HA_POLL_TIMEOUT,
+        )
+        _ha_pending[job_id] = pending
 
-            except httpx.HTTPStatusError as e:
-                logger.warning(
-                    f"HTTP error while polling for {job_id}: {e.response.status_code}"
-                )
-            except Exception as e:
-                logger.warning(
-                    f"An unexpected error occurred while polling {job_id}: {e}"
-                )
+    if _ha_poller_task is None or _ha_poller_task.done():
+        _ha_poller_task = asyncio.create_task(_ha_poller())
 
-    logger.warning(f"Polling for job {job_id} timed out after ~10 minutes.")
-    return None
+    return await pending.future
 
 
 def normalize_ha_report(report: Optional[Dict[str, Any]]) -> dict:
@@ -233,10 +414,15 @@ def normalize_ha_report(report: Optional[Dict[str, Any]]) -> dict:
 
 async def hybrid_analysis_scan(email_id: str, payload: dict) -> dict:
     """Orchestrates fetching attachments, submitting to HA, and returning a normalized report."""
-    attachments = [
-        AttachmentMetadata.model_validate_json(att)
-        for att in payload.get("attachment_metadata", [])
-    ]
+    if not HA_API_KEY:
+        # Nothing could be submitted, so don't spend Gmail calls fetching attachments
+        logger.warning("HYBRID_ANALYSIS_API_KEY is not set. Skipping scan.")
+        return {"verdict": "unknown", "score": 50, "details": "Hybrid Analysis disabled"}
+
+    # Stream payload carries the attachment list as one JSON array string
+    attachments = ATTACHMENT_LIST_ADAPTER.validate_json(
+        payload.get("attachment_metadata") or "[]"
+    )
     message_id = payload.get("message_id")
 
     # --- Find a scannable target (attachment > URL) ---
@@ -261,7 +447,7 @@ async def hybrid_analysis_scan(email_id: str, payload: dict) -> dict:
 
     # Fallback to URL if no attachment was fetched
     if not target_content:
-        urls = payload.get("extracted_urls", [])
+        urls = URL_LIST_ADAPTER.validate_json(payload.get("extracted_urls") or "[]")
         if urls:
             target_url = urls[0]
             logger.info(f"No suitable attachment; scanning first URL: {target_url}")
@@ -301,23 +487,27 @@ async def process_email_analysis(
 
     GUARANTEE: Always publishes a definitive verdict (never 'unknown').
     """
+    # Read the PK once; the ORM object is not refreshed after the UPDATE below
+    email_id = email.id
     try:
-        logger.info(f"Starting analysis for email {email.id}")
+        logger.info(f"Starting analysis for email {email_id}")
 
         # STEP 1: Run primary sandbox analysis (Hybrid Analysis or Mock)
         sandbox_result = None
         if USE_REAL_SANDBOX:
-            logger.info(f"Email {email.id}: Using REAL sandbox (Hybrid Analysis)")
-            sandbox_result = await hybrid_analysis_scan(str(email.id), payload)
+            logger.info(f"Email {email_id}: Using REAL sandbox (Hybrid Analysis)")
+            sandbox_result = await hybrid_analysis_scan(str(email_id), payload)
         else:
-            logger.info(f"Email {email.id}: Using GEMINI")
+            logger.info(f"Email {email_id}: Using GEMINI")
 
             # Extract URLs from original payload
-            extracted_urls = payload.get("extracted_urls", [])
+            extracted_urls = URL_LIST_ADAPTER.validate_json(
+                payload.get("extracted_urls") or "[]"
+            )
 
             if extracted_urls:
                 logger.info(
-                    f"Email {email.id}: Triggering Gemini fallback "
+                    f"Email {email_id}: Triggering Gemini fallback "
                     f"({len(extracted_urls)} URLs to analyze)"
                 )
 
@@ -339,12 +529,12 @@ async def process_email_analysis(
                 }
 
                 logger.info(
-                    f"Email {email.id}: Gemini analysis complete - verdict={ai_verdict}"
+                    f"Email {email_id}: Gemini analysis complete - verdict={ai_verdict}"
                 )
             else:
                 # No URLs available for Gemini analysis
                 logger.warning(
-                    f"Email {email.id}: No URLs for Gemini fallback, "
+                    f"Email {email_id}: No URLs for Gemini fallback, "
                     f"defaulting to 'clean'"
                 )
                 sandbox_result = {
@@ -355,13 +545,16 @@ async def process_email_analysis(
                     "fallback_used": True,
                 }
 
-        # STEP 3: Save to database
-        email.sandbox_result = sandbox_result
-        email.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
-        session.add(email)
+        # STEP 3: Save to database (single UPDATE; status is finalized by the aggregator)
+        await session.execute(
+            update(EmailEvent)
+            .where(EmailEvent.id == email_id)
+            .values(
+                sandbox_result=sandbox_result,
+                updated_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+        )
         await session.commit()
-        await session.refresh(email)
-
 
         # STEP 4: Publish to EMAIL_ANALYSIS_DONE_QUEUE
         # GUARANTEE: verdict is likely definitive, but if Gemini failed ("unknown"), we send that too.
@@ -370,7 +563,7 @@ async def process_email_analysis(
 
         redis = await get_redis_client()
         done_payload = {
-            "job_id": str(email.id),
+            "job_id": str(email_id),
             "sandbox_score": sandbox_result.get("score", 0),
             "verdict": sandbox_result.get("verdict"),
             "sandbox_result": json.dumps(sandbox_result),
@@ -378,7 +571,7 @@ async def process_email_analysis(
         await redis.xadd(EMAIL_ANALYSIS_DONE_QUEUE, done_payload)
 
         logger.info(
-            f"Email {email.id}: Published to DONE queue - "
+            f"Email {email_id}: Published to DONE queue - "
             f"verdict={sandbox_result.get('verdict')}, "
             f"provider={sandbox_result.get('provider')}"
         )
@@ -386,17 +579,63 @@ async def process_email_analysis(
 
     except Exception as e:
         logger.error(
-            f"Error in process_email_analysis for {email.id}: {e}", exc_info=True
+            f"Error in process_email_analysis for {email_id}: {e}", exc_info=True
         )
         try:
-            email.status = EmailStatus.FAILED
-            session.add(email)
+            await session.rollback()
+            await session.execute(
+                update(EmailEvent)
+                .where(EmailEvent.id == email_id)
+                .values(status=EmailStatus.FAILED)
+            )
             await session.commit()
         except Exception as commit_err:
             logger.error(f"Failed to persist FAILED status: {commit_err}")
         return False
 
 
+async def handle_message(message_id: str, payload: dict) -> bool:
+    """Process one stream entry; returns True when it should be acknowledged."""
+    email_id_str = payload.get("email_id")
+
+    if not email_id_str:
+        logger.warning(f"Invalid payload in message {message_id}")
+        return True
+
+    try:
+        email_id = uuid.UUID(email_id_str)
+    except (ValueError, TypeError):
+        logger.error(f"Malformed email ID '{email_id_str}' in message {message_id}")
+        return True
+
+    logger.info(f"Processing message {message_id} (Email ID: {email_id})")
+
+    async with session_scope() as session:
+        try:
+            query = select(EmailEvent).where(EmailEvent.id == email_id)
+            result = await session.exec(query)
+            email = result.first()
+
+            if not email:
+                logger.warning(f"Email {email_id} not found.")
+                return True
+
+            return await process_email_analysis(session, email, payload)
+        except Exception as inner_e:
+            logger.error(f"Error processing {email_id}: {inner_e}")
+            return False
+
+
+async def handle_and_ack(redis, group_name: str, message_id: str, payload: dict) -> None:
+    """Process one stream entry and acknowledge it as soon as it is done."""
+    try:
+        if await handle_message(message_id, payload):
+            await redis.xack(EMAIL_ANALYSIS_QUEUE, group_name, message_id)
+            logger.info(f"Acknowledged message {message_id}")
+    except Exception as e:
+        logger.error(f"Error handling message {message_id}: {e}")
+
+
 async def run_loop() -> None:
     """Main worker loop using Redis Streams Consumer Groups."""
     await init_db()
@@ -418,76 +657,41 @@ async def run_loop() -> None:
         f"Worker {consumer_name} started. Listening on {EMAIL_ANALYSIS_QUEUE}..."
     )
 
-    while True:
-        try:
-            streams = await redis.xreadgroup(
-                group_name,
-                consumer_name,
-                {EMAIL_ANALYSIS_QUEUE: ">"},
-                count=1,
-                block=5000,
-            )
-
-            if not streams:
-                continue
+    # Sliding window: each message is acked when it finishes, and new entries are
+    # read as slots free up, so one slow HA job never holds back the others
+    in_flight: set[asyncio.Task] = set()
+    try:
+        while True:
+            try:
+                if len(in_flight) >= MAX_IN_FLIGHT:
+                    await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    continue
 
-            for _, messages in streams:
-                for message_id, payload in messages:
-                    email_id_str = payload.get("email_id")
+                streams = await redis.xreadgroup(
+                    group_name,
+                    consumer_name,
+                    {EMAIL_ANALYSIS_QUEUE: ">"},
+                    count=MAX_IN_FLIGHT - len(in_flight),
+                    block=5000,
+                )
 
-                    if not email_id_str:
-                        logger.warning(f"Invalid payload in message {message_id}")
-                        await redis.xack(EMAIL_ANALYSIS_QUEUE, group_name, message_id)
-                        continue
+                if not streams:
+                    continue
 
-                    try:
-                        email_id = uuid.UUID(email_id_str)
-                    except (ValueError, TypeError):
-                        logger.error(
-                            f"Malformed email ID '{email_id_str}' in message {message_id}"
+                for _, batch in streams:
+                    for message_id, payload in batch:
+                        task = asyncio.create_task(
+                            handle_and_ack(redis, group_name, message_id, payload)
                         )
-                        await redis.xack(EMAIL_ANALYSIS_QUEUE, group_name, message_id)
-                        continue
-
-                    logger.info(
-                        f"Processing message {message_id} (Email ID: {email_id})"
-                    )
+                        in_flight.add(task)
+                        task.add_done_callback(in_flight.discard)
 
-                    processed_successfully = False
-                    # yield session scope
-
-                    @asynccontextmanager
-                    async def session_scope():
-                        async for s in get_session():
-                            yield s
-                            break
-
-                    async with session_scope() as session:
-                        try:
-                            query = select(EmailEvent).where(EmailEvent.id == email_id)
-                            result = await session.exec(query)
-                            email = result.first()
-
-                            if not email:
-                                logger.warning(f"Email {email_id} not found.")
-                                await redis.xack(
-                                    EMAIL_ANALYSIS_QUEUE, group_name, message_id
-                                )
-                                continue
-
-                            processed_successfully = await process_email_analysis(
-                                session, email, payload
-                            )
-                        except Exception as inner_e:
-                            logger.error(f"Error processing {email_id}: {inner_e}")
-
-                    if processed_successfully:
-                        await redis.xack(EMAIL_ANALYSIS_QUEUE, group_name, message_id)
-                        logger.info(f"Acknowledged message {message_id}")
-
-        except Exception as e:
-            logger.error(f"Worker loop error: {e}")
-            await asyncio.sleep(1)
+            except Exception as e:
+                logger.error(f"Worker loop error: {e}")
+                await asyncio.sleep(1)
+    finally:
+        for task in in_flight:
+            task.cancel()
 
 
 # Create lifespan context manager
@@ -504,6 +708,9 @@ async def lifespan(app: FastAPI):
         await task
     except asyncio.CancelledError:
         pass
+    await stop_ha_poller()
+    await close_ha_client()
+    _GMAIL_EXECUTOR.shutdown(wait=False)
 
 
 app = FastAPI(lifespan=lifespan)
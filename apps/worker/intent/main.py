@@ -11,7 +11,7 @@ from fastapi import FastAPI
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from packages.shared.database import get_session, init_db
+from packages.shared.database import init_db, session_scope
 from packages.shared.constants import EmailStatus, RiskTier
 from packages.shared.models import EmailEvent
 from packages.shared.queue import get_redis_client, EMAIL_INTENT_QUEUE, EMAIL_INTENT_DONE_QUEUE
@@ -61,10 +61,6 @@ async def process_email(
     CRITICAL: This function NO LONGER sets status=COMPLETED.
     The Job Aggregator Service is responsible for final status updates.
     """
-    session.add(email)
-    await session.commit()
-    await session.refresh(email)
-
     logger.info(f'Starting intent processing for email_id={email.id} message_id={email.message_id}')
 
     try:
@@ -119,7 +115,6 @@ async def process_email(
         # Commit changes to database
         session.add(email)
         await session.commit()
-        await session.refresh(email)  # Refresh prevents 'greenlet_spawn' error on attribute access
 
         logger.debug(f'Email {email.id}: Database updated with intent analysis results')
 
@@ -202,15 +197,6 @@ async def run_loop() -> None:
                     logger.info(f'Processing message {message_id} (Email ID: {email_id_str})')
 
                     processed_successfully = False
-                    # Use async context manager for session to avoid leaks and handle errors better
-                    from contextlib import asynccontextmanager
-
-                    @asynccontextmanager
-                    async def session_scope():
-                        async for s in get_session():
-                            yield s
-                            break
-
                     async with session_scope() as session:
                         try:
                             query = select(EmailEvent).where(EmailEvent.id == email_id_str)
@@ -1,10 +1,13 @@
 """Database configuration for MailShieldAI - PostgreSQL only (GCP Cloud SQL)."""
 
 import os
-from collections.abc import AsyncGenerator
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -25,12 +28,35 @@ if not (DATABASE_URL.startswith("postgresql+asyncpg://") or DATABASE_URL.startsw
     )
 
 # GCP Cloud SQL PostgreSQL configuration
-# Using default AsyncAdaptedQueuePool (as recommended by CodeRabbit)
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-)
+# Pool is AsyncAdaptedQueuePool by default; DB_POOL=null switches to NullPool for
+# setups where an external pooler (e.g. PgBouncer) already holds connections.
+_engine_options: dict = {}
+if DATABASE_URL.startswith("postgresql+asyncpg://"):
+    if os.getenv("DB_POOL", "queue").lower() == "null":
+        _engine_options["poolclass"] = NullPool
+        # PgBouncer rejects unknown startup parameters (so no server_settings), and in
+        # transaction mode server-side prepared statements must not be cached or reused
+        _engine_options["connect_args"] = {
+            "timeout": 10,
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    else:
+        _engine_options["connect_args"] = {
+            "timeout": 10,
+            # Short OLTP queries never benefit from JIT; skip its planning overhead
+            "server_settings": {"jit": "off"},
+        }
+        _engine_options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "5")),  # Fail fast instead of queueing
+            # Recycle connections instead of pre-pinging on every checkout (saves a round-trip)
+            pool_recycle=1800,
+        )
+
+engine = create_async_engine(DATABASE_URL, **_engine_options)
 
 
 async def init_db() -> None:
@@ -39,7 +65,16 @@ async def init_db() -> None:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
+# Sessions keep attribute state after commit: all column defaults are assigned
+# client-side, so reloading a just-committed row would only re-read known values.
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Yield an async database session."""
-    async with AsyncSession(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Async context manager around a database session, for use outside FastAPI."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
@@ -9,7 +9,7 @@ import os
 import sys
 from typing import Optional
 
-from pythonjsonlogger import json as jsonlogger
+from pythonjsonlogger.orjson import OrjsonFormatter
 
 
 def setup_logging(
@@ -56,8 +56,8 @@ def setup_logging(
     
     # Configure formatter based on format type
     if format_type.lower() == "json":
-        # JSON formatter with renamed fields for better observability
-        formatter = jsonlogger.JsonFormatter(
+        # JSON formatter (orjson-backed) with renamed fields for better observability
+        formatter = OrjsonFormatter(
             fmt="%(asctime)s %(name)s %(levelname)s %(message)s",
             rename_fields={"levelname": "severity", "asctime": "timestamp"},
         )
@@ -7,7 +7,7 @@ import uuid
 from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 from sqlmodel import JSON, Column, Enum, Field, SQLModel
 
 
@@ -39,6 +39,16 @@ class EmailEvent(SQLModel, table=True):
     """Email event model - represents an analyzed email."""
 
     __tablename__ = "email_events"
+    __table_args__ = (
+        # Covers the per-user risk tier aggregation behind /api/stats
+        Index("ix_email_events_user_id_risk_tier", "user_id", "risk_tier"),
+        # Serve list_emails' ORDER BY (received_at, id) DESC and its keyset cursor
+        # (optionally per status) from the index
+        Index("ix_email_events_user_id_received_at_id", "user_id", "received_at", "id"),
+        Index("ix_email_events_user_id_status_received_at_id", "user_id", "status", "received_at", "id"),
+        # One row per Gmail message per user; backs sync dedup and ON CONFLICT
+        Index("uq_email_events_user_id_message_id", "user_id", "message_id", unique=True),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     user_id: uuid.UUID = Field(foreign_key="users.id", index=True)
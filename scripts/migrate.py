@@ -1,26 +1,60 @@
 """Database migration script to add new threat intelligence columns."""
 
+import argparse
 import asyncio
 import os
+import sys
+
+# Add project root to sys.path to enable packages imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from dotenv import load_dotenv
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set")
+from packages.shared.database import engine
+from sqlalchemy import text
+
+UNIQUE_MESSAGE_INDEX = "uq_email_events_user_id_message_id"
 
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+# Rows beyond the first for each (user_id, message_id)
+COUNT_DUPLICATE_MESSAGES_SQL = (
+    "SELECT count(*) - count(DISTINCT (user_id, message_id)) "
+    "FROM email_events WHERE message_id IS NOT NULL"
+)
+# Keep one copy per message: prefer one with sandbox or intent results, then the earliest
+DEDUPE_MESSAGES_SQL = """
+DELETE FROM email_events WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id, message_id
+            ORDER BY
+                (COALESCE(sandbox_result::text, 'null') <> 'null' OR intent IS NOT NULL) DESC,
+                created_at,
+                id
+        ) AS copy_rank
+        FROM email_events
+        WHERE message_id IS NOT NULL
+    ) ranked
+    WHERE copy_rank > 1
+)
+"""
 
-engine = create_async_engine(DATABASE_URL, echo=True)
 
+async def run_statement(conn, sql: str) -> bool:
+    """Execute one migration statement, reporting the outcome."""
+    print(f"Running: {sql}")
+    try:
+        await conn.execute(text(sql))
+        print("  ✓ Success")
+        return True
+    except Exception as e:
+        print(f"  ✗ Error: {e}")
+        return False
 
-async def migrate():
-    """Add new columns to email_events table."""
+
+async def migrate(dedupe: bool = False) -> bool:
+    """Add new columns and indexes to email_events table; return False if any statement failed."""
     
     # New columns to add
     migrations = [
@@ -49,21 +83,66 @@ async def migrate():
         # usage of 'IF NOT EXISTS' for enum values requires newer Postgres or DO block, 
         # but simpler to just run it and ignore error if already exists (handled by loop below)
         "ALTER TYPE email_status_enum ADD VALUE IF NOT EXISTS 'SPAM'",
+
+        # Index-only scan for the per-user risk tier counts on the dashboard
+        "CREATE INDEX IF NOT EXISTS ix_email_events_user_id_risk_tier ON email_events (user_id, risk_tier)",
+
+        # Keyset pagination in list_emails needs a received_at on every row
+        "UPDATE email_events SET received_at = created_at WHERE received_at IS NULL",
+
+        # Index-ordered, keyset-paginated email listing
+        "CREATE INDEX IF NOT EXISTS ix_email_events_user_id_received_at_id ON email_events (user_id, received_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_email_events_user_id_status_received_at_id ON email_events (user_id, status, received_at, id)",
+        # Superseded by the (received_at, id) indexes above
+        "DROP INDEX IF EXISTS ix_email_events_user_id_received_at",
+        "DROP INDEX IF EXISTS ix_email_events_user_id_status_received_at",
     ]
-    
-    async with engine.begin() as conn:
+
+    # Autocommit: every statement is its own transaction, so one failure cannot
+    # roll back the others, and CREATE INDEX CONCURRENTLY is allowed
+    failed = []
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
         for sql in migrations:
-            print(f"Running: {sql}")
-            try:
-                await conn.execute(text(sql))
-                print("  ✓ Success")
-            except Exception as e:
-                print(f"  ✗ Error: {e}")
-    
-    print("\nMigration complete!")
+            if not await run_statement(conn, sql):
+                failed.append(sql)
 
+        # Sync dedup / ON CONFLICT target. Duplicate rows block the unique index;
+        # deleting them is opt-in because it removes user data.
+        surplus = (await conn.execute(text(COUNT_DUPLICATE_MESSAGES_SQL))).scalar_one()
+        if surplus and not dedupe:
+            print(
+                f"\n✗ {surplus} duplicate (user_id, message_id) row(s) block {UNIQUE_MESSAGE_INDEX}. "
+                "Rerun with --dedupe to delete them (the copy with analysis results is kept)."
+            )
+            failed.append(UNIQUE_MESSAGE_INDEX)
+        else:
+            if surplus:
+                result = await conn.execute(text(DEDUPE_MESSAGES_SQL))
+                print(f"Deleted {result.rowcount} duplicate (user_id, message_id) row(s)")
+            create_sql = (
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {UNIQUE_MESSAGE_INDEX} "
+                "ON email_events (user_id, message_id)"
+            )
+            if not await run_statement(conn, create_sql):
+                failed.append(create_sql)
+                # A failed concurrent build leaves an INVALID index that
+                # IF NOT EXISTS would skip on the next run
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {UNIQUE_MESSAGE_INDEX}"))
 
-if __name__ == "__main__":
-    asyncio.run(migrate())
+    if failed:
+        print(f"\nMigration failed: {len(failed)} step(s) errored.")
+        return False
+    print("\nMigration complete!")
+    return True
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="delete duplicate (user_id, message_id) email rows before adding the unique index",
+    )
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(migrate(dedupe=args.dedupe)) else 1)